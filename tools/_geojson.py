@@ -0,0 +1,93 @@
+"""GeoJSON read/write helpers shared by the tools.
+
+Uses orjson when it is installed (C-accelerated parse and dump) and falls
+back to the stdlib json module otherwise, so the tools stay stdlib-only.
+Both write non-ASCII text as raw UTF-8; only float spelling differs between
+them (json writes 1e-05 and 1e+16 where orjson writes 0.00001 and 1e16).
+Output is compact by default; tools expose --pretty for 2-space indentation.
+"""
+
+from __future__ import annotations
+
+import argparse
+import codecs
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Dict
+
+try:
+    import orjson
+except ImportError:  # optional accelerator
+    orjson = None
+
+
+def load_geojson(path: Path) -> Dict[str, Any]:
+    raw = path.read_bytes()
+    # Layers edited on Windows may carry a UTF-8 BOM; neither parser accepts it.
+    if raw.startswith(codecs.BOM_UTF8):
+        raw = raw[len(codecs.BOM_UTF8):]
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def parse_output_args(description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="indent the GeoJSON output (2 spaces) for human inspection",
+    )
+    return parser.parse_args()
+
+
+def _dumps_compact(obj: Any, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False).encode("utf-8")
+
+
+def _dumps_pretty(data: Dict[str, Any], sort_keys: bool) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, option=option)
+    return (json.dumps(data, indent=2, sort_keys=sort_keys, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _stream_compact(handle: BinaryIO, data: Dict[str, Any], sort_keys: bool) -> None:
+    # One feature per line, so only a single serialized feature is held in memory at
+    # a time (and diffs stay per-feature).
+    handle.write(b"{")
+    for n, key in enumerate(sorted(data) if sort_keys else data):
+        if n:
+            handle.write(b",")
+        handle.write(_dumps_compact(key) + b":")
+        if key != "features":
+            handle.write(_dumps_compact(data[key], sort_keys))
+            continue
+        handle.write(b"[")
+        for i, feature in enumerate(data[key]):
+            handle.write(b",\n" if i else b"\n")
+            handle.write(_dumps_compact(feature, sort_keys))
+        handle.write(b"\n]")
+    handle.write(b"}\n")
+
+
+def write_geojson(path: Path, data: Dict[str, Any], pretty: bool = False, sort_keys: bool = False) -> None:
+    # Tools rewrite their own inputs in place, so output goes to a sibling temp file that
+    # replaces the target only once complete: an interrupted or failed write (Ctrl-C,
+    # full disk) leaves the original layer intact.
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with tmp.open("wb") as handle:
+            if pretty:
+                handle.write(_dumps_pretty(data, sort_keys))
+            else:
+                _stream_compact(handle, data, sort_keys)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,196 @@
+"""Planning-grade geometry helpers shared by the zone assignment and clipping tools.
+
+Coordinates are WGS84 lon/lat degrees in GeoJSON nesting. Polygon holes are
+ignored throughout. Point-in-polygon tests are batched: they take parallel
+lon/lat lists and return one result per point.
+"""
+
+from bisect import bisect_left
+from math import cos, floor, radians, sqrt
+
+# Bucket size (degrees) of the grid index used to prune candidate zones per point.
+INDEX_CELL_DEG = 1.0
+
+# Shared vertices are matched at 1e-7 degree (~1 cm) resolution so float noise
+# between neighboring hexes does not break vertex matching.
+VERTEX_SCALE = 10_000_000
+
+def centroid_of_polygon(poly_coords):
+    # poly_coords: [ [ [lon,lat], ... ] ] (outer ring only)
+    ring = poly_coords[0]
+    # drop closing point
+    xs = [p[0] for p in ring[:-1]]
+    ys = [p[1] for p in ring[:-1]]
+    return (sum(xs) / len(xs), sum(ys) / len(ys))
+
+def ring_area_centroid(ring):
+    # Shoelace pass over a closed ring: returns (area, cx, cy) with the area-weighted
+    # centroid; zero-area rings fall back to the vertex mean. Seed placement uses this.
+    # The zone assignment tools keep centroid_of_polygon on purpose: on the regular hexes
+    # the two agree, and the vertex mean keeps existing zone assignments reproducible.
+    pts = ring[:-1]
+    x0, y0 = pts[0][0], pts[0][1]
+    # Offsets from the first vertex keep the cross products small; at raw lon/lat the
+    # products cancel to ~1e-12 degree noise in the centroid.
+    rel = [(p[0] - x0, p[1] - y0) for p in pts]
+    cross_sum = 0.0
+    cx = 0.0
+    cy = 0.0
+    for (x1, y1), (x2, y2) in zip(rel, rel[1:] + rel[:1]):
+        cross = x1 * y2 - x2 * y1
+        cross_sum += cross
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    if len(rel) < 3 or cross_sum == 0:
+        return (0.0, x0 + sum(x for x, _ in rel) / len(rel), y0 + sum(y for _, y in rel) / len(rel))
+    # centroid = sum / (6 * signed area), signed area = cross_sum / 2
+    return (abs(cross_sum) / 2.0, x0 + cx / (3.0 * cross_sum), y0 + cy / (3.0 * cross_sum))
+
+def hex_vertices(hf):
+    ring = hf["geometry"]["coordinates"][0]
+    return ring[:-1]  # drop closing vertex
+
+def quantize_vertex(v):
+    # Integer (lon, lat) key for matching/de-duplicating vertices; see VERTEX_SCALE.
+    return (round(v[0] * VERTEX_SCALE), round(v[1] * VERTEX_SCALE))
+
+def points_in_ring(xs, ys, ring):
+    # Batched ray casting: walk the ring edges once. Points are sorted by latitude up
+    # front, so each edge bisects straight to the points whose latitude it straddles
+    # (min(y1, y2) <= y < max(y1, y2)) instead of scanning every point.
+    order = sorted(range(len(ys)), key=ys.__getitem__)
+    sorted_ys = [ys[j] for j in order]
+    inside = [False] * len(xs)
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        if y1 == y2:
+            continue  # horizontal edges never straddle a query latitude
+        lo, hi = (y1, y2) if y1 < y2 else (y2, y1)
+        dx = x2 - x1
+        dy = y2 - y1
+        for k in range(bisect_left(sorted_ys, lo), bisect_left(sorted_ys, hi)):
+            j = order[k]
+            if xs[j] < dx * (sorted_ys[k] - y1) / dy + x1:
+                inside[j] = not inside[j]
+    return inside
+
+def points_in_polygon(xs, ys, polygon_coords):
+    # polygon_coords: [outer_ring, hole1, hole2...]
+    # Ignore holes for now (planning-grade); add later if you introduce holes.
+    return points_in_ring(xs, ys, polygon_coords[0])
+
+def points_in_geometry(xs, ys, geom):
+    gtype = geom["type"]
+    coords = geom["coordinates"]
+    if gtype == "Polygon":
+        return points_in_polygon(xs, ys, coords)
+    if gtype == "MultiPolygon":
+        inside = [False] * len(xs)
+        for poly in coords:
+            inside = [a or b for a, b in zip(inside, points_in_polygon(xs, ys, poly))]
+        return inside
+    raise ValueError(f"Unsupported geometry type: {gtype}")
+
+def geometry_bbox(geom):
+    # (lon_min, lat_min, lon_max, lat_max) over every outer ring of the geometry.
+    gtype = geom["type"]
+    coords = geom["coordinates"]
+    if gtype == "Polygon":
+        rings = [coords[0]]
+    elif gtype == "MultiPolygon":
+        rings = [poly[0] for poly in coords]
+    else:
+        raise ValueError(f"Unsupported geometry type: {gtype}")
+    xs = [p[0] for ring in rings for p in ring]
+    ys = [p[1] for ring in rings for p in ring]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def build_zone_index(bboxes):
+    # Uniform lon/lat grid: bucket -> indices of the zones whose bbox overlaps it.
+    # Buckets list zones in input order, so first-match semantics survive the lookup.
+    index = {}
+    for i, (x0, y0, x1, y1) in enumerate(bboxes):
+        for gx in range(floor(x0 / INDEX_CELL_DEG), floor(x1 / INDEX_CELL_DEG) + 1):
+            for gy in range(floor(y0 / INDEX_CELL_DEG), floor(y1 / INDEX_CELL_DEG) + 1):
+                index.setdefault((gx, gy), []).append(i)
+    return index
+
+def query_zone_index(index, x, y):
+    return index.get((floor(x / INDEX_CELL_DEG), floor(y / INDEX_CELL_DEG)), ())
+
+def points_in_zone(xs, ys, rows, geom, bbox):
+    # The subset of rows (indices into xs/ys) whose points fall inside geom. The exact
+    # bbox test runs first: four comparisons reject most points before the ray-cast.
+    x0, y0, x1, y1 = bbox
+    rows = [r for r in rows if x0 <= xs[r] <= x1 and y0 <= ys[r] <= y1]
+    if not rows:
+        return []
+    mask = points_in_geometry([xs[r] for r in rows], [ys[r] for r in rows], geom)
+    return [r for r, hit in zip(rows, mask) if hit]
+
+def first_matching_zone(xs, ys, zone_geoms):
+    # zone_geoms: [(zone_id, geometry), ...]. Returns, per point, the index of the first
+    # zone (in input order, skipping blank zone_ids) containing it, or -1.
+    # Each zone only tests the points no earlier zone claimed.
+    bboxes = [geometry_bbox(g) for _, g in zone_geoms]
+    index = build_zone_index(bboxes)
+    candidates = [query_zone_index(index, x, y) for x, y in zip(xs, ys)]
+    zone_idx = [-1] * len(xs)
+    for i, ((zid, geom), bbox) in enumerate(zip(zone_geoms, bboxes)):
+        if not zid:
+            continue
+        pending = [j for j, z in enumerate(zone_idx) if z == -1 and i in candidates[j]]
+        for j in points_in_zone(xs, ys, pending, geom, bbox):
+            zone_idx[j] = i
+    return zone_idx
+
+def miles_per_degree_lon(lat_deg: float) -> float:
+    return 69.0 * cos(radians(lat_deg))
+
+def expand_bbox_miles(bbox, mi):
+    # Grow a bbox by `mi` miles on every side. The lon margin uses the highest |lat| of the
+    # grown box, where a degree of lon is shortest, so the box never under-covers.
+    x0, y0, x1, y1 = bbox
+    dlat = mi / 69.0
+    y0, y1 = y0 - dlat, y1 + dlat
+    dlon = mi / miles_per_degree_lon(min(max(abs(y0), abs(y1)), 89.0))
+    return (x0 - dlon, y0, x1 + dlon, y1)
+
+def geometry_segments(geom):
+    # Precompute every outer-ring segment once per zone as (ax, ay, abx, aby, ab2),
+    # so the per-point distance scan is pure arithmetic over a flat tuple list.
+    gtype = geom["type"]
+    coords = geom["coordinates"]
+    if gtype == "Polygon":
+        rings = [coords[0]]
+    elif gtype == "MultiPolygon":
+        rings = [poly[0] for poly in coords]
+    else:
+        raise ValueError(f"Unsupported geometry type: {gtype}")
+    segs = []
+    for ring in rings:
+        for (ax, ay), (bx, by) in zip(ring, ring[1:]):
+            abx, aby = (bx - ax), (by - ay)
+            segs.append((ax, ay, abx, aby, abx * abx + aby * aby))
+    return segs
+
+def distance_to_geometry_miles(point, segs, mpd_lon=None):
+    # point is (lon, lat) in degrees; segs from geometry_segments(); returns approximate miles.
+    # Project p onto each segment in degree-space (small distances => acceptable), then use
+    # an equirectangular approximation at the point's latitude: good enough for ~tens of miles.
+    # Callers measuring one point against several zones pass mpd_lon to skip the cos().
+    px, py = point
+    if mpd_lon is None:
+        mpd_lon = miles_per_degree_lon(py)
+    best = float("inf")
+    for ax, ay, abx, aby, ab2 in segs:
+        if ab2 == 0:
+            t = 0.0
+        else:
+            t = ((px - ax) * abx + (py - ay) * aby) / ab2
+            t = 0.0 if t < 0.0 else 1.0 if t > 1.0 else t
+        mx = (px - (ax + t * abx)) * mpd_lon
+        my = (py - (ay + t * aby)) * 69.0
+        d2 = mx * mx + my * my
+        if d2 < best:
+            best = d2
+    return sqrt(best)
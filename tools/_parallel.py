@@ -0,0 +1,33 @@
+"""Process-pool fan-out shared by the tools that parallelize large runs.
+
+Work items are mapped through a worker function that reads shared state from a
+module global, set once per process by an initializer, so the state is pickled
+once per worker instead of once per item. Small runs stay in-process.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Sequence
+
+# ProcessPoolExecutor rejects more than 61 workers on Windows (WaitForMultipleObjects limit).
+PARALLEL_MAX_WORKERS = 61
+
+
+def pool_map(
+    func: Callable[[Any], Any],
+    items: Sequence[Any],
+    initializer: Callable[[Any], None],
+    state: Any,
+    parallel: bool,
+    chunksize: int = 1,
+) -> List[Any]:
+    # Results come back in item order either way. parallel is the caller's size
+    # threshold; a single CPU or a single item also runs serially.
+    workers = min(os.cpu_count() or 1, PARALLEL_MAX_WORKERS, len(items))
+    if parallel and workers > 1:
+        with ProcessPoolExecutor(workers, initializer=initializer, initargs=(state,)) as pool:
+            return list(pool.map(func, items, chunksize=chunksize))
+    initializer(state)
+    return [func(item) for item in items]
@@ -4,9 +4,12 @@
 from __future__ import annotations
 
 import csv
-import json
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple
+
+from _geojson import load_geojson, parse_output_args, write_geojson
+from _geom import quantize_vertex
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -16,6 +19,7 @@ OUTPUT_CSV_PATH = ROOT / "data" / "tierb_after_tiera_by_zone.csv"
 
 
 Vertex = Tuple[float, float]
+VertexKey = Tuple[int, int]  # see _geom.quantize_vertex
 
 
 def iter_vertices(geometry: Dict) -> Iterable[Vertex]:
@@ -34,44 +38,38 @@ def iter_vertices(geometry: Dict) -> Iterable[Vertex]:
         raise ValueError(f"Unsupported geometry type: {geom_type}")
 
 
-def build_neighbor_map(hex_features: List[Dict]) -> Dict[str, Set[str]]:
-    vertex_to_cells: Dict[Vertex, Set[str]] = {}
-    cell_vertices: Dict[str, Set[Vertex]] = {}
+def build_neighbor_map(
+    hex_features: List[Dict], cell_ids: Optional[Iterable[str]] = None
+) -> Dict[str, List[str]]:
+    # With cell_ids, only those cells get a neighbor list; every hex still
+    # contributes its vertices so the lists themselves are unchanged.
+    vertex_to_cells: DefaultDict[VertexKey, List[str]] = defaultdict(list)
+    cell_vertices: Dict[str, Set[VertexKey]] = {}
+    wanted = None if cell_ids is None else set(cell_ids)
     for feature in hex_features:
         cell_id = feature["properties"].get("cell_id")
         if not cell_id:
             continue
-        vertices = set(iter_vertices(feature["geometry"]))
-        cell_vertices[cell_id] = vertices
+        vertices = {quantize_vertex(v) for v in iter_vertices(feature["geometry"])}
+        if wanted is None or cell_id in wanted:
+            cell_vertices[cell_id] = vertices
         for vertex in vertices:
-            vertex_to_cells.setdefault(vertex, set()).add(cell_id)
+            vertex_to_cells[vertex].append(cell_id)
 
-    neighbor_map: Dict[str, Set[str]] = {}
+    neighbor_map: Dict[str, List[str]] = {}
     for cell_id, vertices in cell_vertices.items():
-        neighbors: Set[str] = set()
-        for vertex in vertices:
-            neighbors.update(vertex_to_cells.get(vertex, set()))
-        neighbor_map[cell_id] = neighbors
+        neighbor_map[cell_id] = list(
+            dict.fromkeys(cell for vertex in vertices for cell in vertex_to_cells[vertex])
+        )
     return neighbor_map
 
 
-def load_geojson(path: Path) -> Dict:
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
-
-
-def write_geojson(path: Path, data: Dict) -> None:
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(data, handle, indent=2)
-        handle.write("\n")
-
-
 def main() -> None:
+    args = parse_output_args(__doc__)
+
     hex_cells = load_geojson(HEX_CELLS_PATH)
     sites = load_geojson(SITES_PATH)
 
-    neighbor_map = build_neighbor_map(hex_cells["features"])
-
     tierb_candidates_by_cell: Dict[str, List[Dict]] = {}
     tierb_required_features: List[Dict] = []
     tierb_alt_features: List[Dict] = []
@@ -95,6 +93,12 @@ def main() -> None:
             if cell_id:
                 tierb_candidates_by_cell.setdefault(cell_id, []).append(feature)
 
+    # Coverage only ever looks up the hexes hosting a Tier A site.
+    neighbor_map = build_neighbor_map(
+        hex_cells["features"],
+        (f.get("properties", {}).get("cell_id") for f in tiera_features),
+    )
+
     satisfied_required = 0
     tiera_used: Set[str] = set()
 
@@ -103,7 +107,7 @@ def main() -> None:
         cell_id = props.get("cell_id")
         if not cell_id:
             continue
-        covered_cells = neighbor_map.get(cell_id, {cell_id})
+        covered_cells = neighbor_map.get(cell_id, [cell_id])
         satisfied_any = False
         for covered_cell in covered_cells:
             candidates = tierb_candidates_by_cell.get(covered_cell, [])
@@ -199,7 +203,7 @@ def main() -> None:
         if feature.get("properties", {}).get("status") != "SATISFIED"
     )
 
-    write_geojson(SITES_PATH, sites)
+    write_geojson(SITES_PATH, sites, pretty=args.pretty)
 
     print(
         "Summary:",
@@ -1,88 +1,78 @@
-﻿import json
-from pathlib import Path
+﻿from pathlib import Path
+
+from _geojson import load_geojson, parse_output_args, write_geojson
+from _geom import (
+    build_zone_index,
+    centroid_of_polygon,
+    first_matching_zone,
+    geometry_bbox,
+    hex_vertices,
+    points_in_zone,
+    query_zone_index,
+)
 
 ZONES_PATH = Path("data/zones.geojson")
 HEX_PATH = Path("data/hex_cells.geojson")
 
-def centroid_of_polygon(poly_coords):
-    ring = poly_coords[0]
-    xs = [p[0] for p in ring[:-1]]
-    ys = [p[1] for p in ring[:-1]]
-    return (sum(xs) / len(xs), sum(ys) / len(ys))
-
-def point_in_ring(point, ring):
-    x, y = point
-    inside = False
-    n = len(ring)
-    for i in range(n - 1):
-        x1, y1 = ring[i]
-        x2, y2 = ring[i + 1]
-        if (y1 > y) != (y2 > y):
-            xinters = (x2 - x1) * (y - y1) / ((y2 - y1) + 1e-12) + x1
-            if x < xinters:
-                inside = not inside
-    return inside
-
-def point_in_polygon(point, polygon_coords):
-    outer = polygon_coords[0]
-    if not point_in_ring(point, outer):
-        return False
-    # planning-grade: ignore holes
-    return True
-
-def point_in_geometry(point, geom):
-    gtype = geom["type"]
-    coords = geom["coordinates"]
-    if gtype == "Polygon":
-        return point_in_polygon(point, coords)
-    if gtype == "MultiPolygon":
-        return any(point_in_polygon(point, poly) for poly in coords)
-    raise ValueError(f"Unsupported geometry type: {gtype}")
-
-def hex_vertices(hf):
-    ring = hf["geometry"]["coordinates"][0]
-    return ring[:-1]
-
 def main():
-    zones = json.loads(ZONES_PATH.read_text(encoding="utf-8-sig"))
-    hexes = json.loads(HEX_PATH.read_text(encoding="utf-8-sig"))
+    args = parse_output_args("Assign zone_id to each hex by centroid, falling back to a vertex-touch vote.")
+
+    zones = load_geojson(ZONES_PATH)
+    hexes = load_geojson(HEX_PATH)
 
     zone_geoms = [(f["properties"].get("zone_id",""), f["geometry"]) for f in zones["features"]]
 
-    assigned_centroid = 0
+    features = hexes["features"]
+    lons = []
+    lats = []
+    for hf in features:
+        lon, lat = centroid_of_polygon(hf["geometry"]["coordinates"])
+        lons.append(lon)
+        lats.append(lat)
+
+    # 1) centroid-in-zone (first matching zone wins)
+    zone_idx = first_matching_zone(lons, lats, zone_geoms)
+    zone_of = [None if i == -1 else zone_geoms[i][0] for i in zone_idx]
+    assigned_centroid = sum(1 for z in zone_of if z is not None)
+
+    # 2) vertex-touch vote: batch the vertices of every still-unassigned hex
+    owner = []
+    vxs = []
+    vys = []
+    for j, z in enumerate(zone_of):
+        if z is None:
+            for v in hex_vertices(features[j]):
+                owner.append(j)
+                vxs.append(v[0])
+                vys.append(v[1])
+
+    zone_bboxes = [geometry_bbox(g) for _, g in zone_geoms]
+    index = build_zone_index(zone_bboxes)
+    vcandidates = [query_zone_index(index, x, y) for x, y in zip(vxs, vys)]
+
+    hits_by_hex = {}
+    for i, (zid0, g) in enumerate(zone_geoms):
+        if not zid0:
+            continue
+        pending = [k for k, c in enumerate(vcandidates) if i in c]
+        for k in points_in_zone(vxs, vys, pending, g, zone_bboxes[i]):
+            hits = hits_by_hex.setdefault(owner[k], {})
+            hits[zid0] = hits.get(zid0, 0) + 1
+
     assigned_vertex = 0
+    for j, hits in hits_by_hex.items():
+        # Most touching vertices wins; ties go to the lexically smallest zone_id.
+        best_z, best_n = "", -1
+        for z, n in hits.items():
+            if n > best_n or (n == best_n and z < best_z):
+                best_z, best_n = z, n
+        zone_of[j] = best_z
+        assigned_vertex += 1
+
     unassigned = 0
 
-    for hf in hexes["features"]:
+    for hf, zid in zip(features, zone_of):
         props = hf.get("properties", {})
-        c = centroid_of_polygon(hf["geometry"]["coordinates"])
-        verts = hex_vertices(hf)
-
-        zid = None
-
-        # 1) centroid-in-zone
-        for zid0, g in zone_geoms:
-            if zid0 and point_in_geometry(c, g):
-                zid = zid0
-                assigned_centroid += 1
-                break
-
-        # 2) vertex-touch vote
-        if zid is None:
-            hits = {}
-            for zid0, g in zone_geoms:
-                if not zid0:
-                    continue
-                count = 0
-                for v in verts:
-                    if point_in_geometry(v, g):
-                        count += 1
-                if count:
-                    hits[zid0] = count
-
-            if hits:
-                zid = sorted(hits.items(), key=lambda kv: (-kv[1], kv[0]))[0][0]
-                assigned_vertex += 1
 
         if zid is None:
             props["zone_id"] = ""
@@ -92,7 +82,7 @@ def main():
 
         hf["properties"] = props
 
-    HEX_PATH.write_text(json.dumps(hexes, indent=2), encoding="utf-8")
+    write_geojson(HEX_PATH, hexes, pretty=args.pretty)
     print(f"Assigned by centroid: {assigned_centroid}; by vertex-touch: {assigned_vertex}; unassigned: {unassigned}.")
 
 if __name__ == "__main__":
@@ -1,64 +1,62 @@
-﻿import json
-from pathlib import Path
+﻿from pathlib import Path
+
+from _geojson import load_geojson, parse_output_args, write_geojson
+from _geom import (
+    build_zone_index,
+    geometry_bbox,
+    hex_vertices,
+    points_in_zone,
+    quantize_vertex,
+    query_zone_index,
+)
 
 ZONES_PATH = Path("data/zones.geojson")
 HEX_PATH = Path("data/hex_cells.geojson")
 
-def point_in_ring(point, ring):
-    x, y = point
-    inside = False
-    n = len(ring)
-    for i in range(n - 1):
-        x1, y1 = ring[i]
-        x2, y2 = ring[i + 1]
-        if (y1 > y) != (y2 > y):
-            xinters = (x2 - x1) * (y - y1) / ((y2 - y1) + 1e-12) + x1
-            if x < xinters:
-                inside = not inside
-    return inside
-
-def point_in_polygon(point, polygon_coords):
-    outer = polygon_coords[0]
-    if not point_in_ring(point, outer):
-        return False
-    # planning-grade: ignore holes for zone clipping
-    return True
-
-def point_in_geometry(point, geom):
-    gtype = geom["type"]
-    coords = geom["coordinates"]
-    if gtype == "Polygon":
-        return point_in_polygon(point, coords)
-    if gtype == "MultiPolygon":
-        return any(point_in_polygon(point, poly) for poly in coords)
-    raise ValueError(f"Unsupported geometry type: {gtype}")
-
-def hex_vertices(hf):
-    ring = hf["geometry"]["coordinates"][0]
-    return ring[:-1]  # drop closing vertex
-
 def main():
-    zones = json.loads(ZONES_PATH.read_text(encoding="utf-8-sig"))
-    hexes = json.loads(HEX_PATH.read_text(encoding="utf-8-sig"))
+    args = parse_output_args("Drop hexes with no vertex inside any zone.")
 
-    zone_geoms = [f["geometry"] for f in zones["features"]]
-
-    kept = []
-    dropped = 0
+    zones = load_geojson(ZONES_PATH)
+    hexes = load_geojson(HEX_PATH)
 
-    for hf in hexes["features"]:
-        verts = hex_vertices(hf)
-        keep = False
-        for v in verts:
-            if any(point_in_geometry(v, zg) for zg in zone_geoms):
-                keep = True
-                break
-        if keep:
-            kept.append(hf)
-        else:
-            dropped += 1
+    zone_geoms = [f["geometry"] for f in zones["features"]]
 
-    HEX_PATH.write_text(json.dumps({"type": "FeatureCollection", "features": kept}, indent=2), encoding="utf-8")
+    features = hexes["features"]
+
+    # Adjacent hexes share corners, so each distinct vertex (quantized to 1e-7 deg)
+    # is tested once and every hex just records which vertex rows it uses.
+    vertex_rows = {}
+    vxs = []
+    vys = []
+    hex_rows = []
+    for hf in features:
+        rows = []
+        for v in hex_vertices(hf):
+            key = quantize_vertex(v)
+            r = vertex_rows.get(key)
+            if r is None:
+                r = vertex_rows[key] = len(vxs)
+                vxs.append(v[0])
+                vys.append(v[1])
+            rows.append(r)
+        hex_rows.append(rows)
+
+    zone_bboxes = [geometry_bbox(g) for g in zone_geoms]
+    index = build_zone_index(zone_bboxes)
+    candidates = [query_zone_index(index, x, y) for x, y in zip(vxs, vys)]
+
+    vert_inside = [False] * len(vxs)
+    for i, zg in enumerate(zone_geoms):
+        # Only vertices near this zone, not already inside an earlier one, need testing.
+        pending = [r for r, c in enumerate(candidates) if not vert_inside[r] and i in c]
+        for r in points_in_zone(vxs, vys, pending, zg, zone_bboxes[i]):
+            vert_inside[r] = True
+
+    keep = [any(vert_inside[r] for r in rows) for rows in hex_rows]
+    kept = [hf for hf, k in zip(features, keep) if k]
+    dropped = len(features) - len(kept)
+
+    write_geojson(HEX_PATH, {"type": "FeatureCollection", "features": kept}, pretty=args.pretty)
     print(f"Kept {len(kept)} hexes (touch zone by vertex); dropped {dropped} fully outside zones.")
 
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
-﻿import json
-from math import cos, radians, sqrt
+﻿from math import cos, radians, sqrt
 from pathlib import Path
 
+from _geojson import parse_output_args, write_geojson
+
 # CONUS bounding box (planning-grade).
 # lon_min, lat_min, lon_max, lat_max
 BBOX = (-125.0, 24.0, -66.5, 49.5)
@@ -34,6 +35,8 @@ def hex_polygon(center_lon: float, center_lat: float, r_mi: float):
     return [[[lon, lat] for lon, lat in pts]]
 
 def main():
+    args = parse_output_args("Generate the CONUS hex overlay.")
+
     lon_min, lat_min, lon_max, lat_max = BBOX
 
     features = []
@@ -89,7 +92,7 @@ def main():
         row += 1
 
     fc = {"type": "FeatureCollection", "features": features}
-    OUT_PATH.write_text(json.dumps(fc, indent=2), encoding="utf-8")
+    write_geojson(OUT_PATH, fc, pretty=args.pretty)
     print(f"Wrote {len(features)} hex cells to {OUT_PATH}")
 
 if __name__ == "__main__":
@@ -1,6 +1,8 @@
-﻿import json
+﻿from itertools import product
 from pathlib import Path
 
+from _geojson import load_geojson, parse_output_args, write_geojson
+
 HEX_PATH = Path("data/hex_cells.geojson")
 
 # Zone-based default assumptions (planning-grade; conservative)
@@ -73,10 +75,8 @@ def tierB_requirements(conf_class):
         return (1, 1)
     return (1, 0)
 
-def compute_tierC_demand(p, zid):
+def compute_tierC_demand(pop, clutter, zid):
     # Rough proxy: based on clutter + pop_weight; refined later with real population layers.
-    pop = float(p.get("pop_weight", 0.0))
-    clutter = int(p.get("clutter_high", 0))
     demand = pop + (0.2 if clutter else 0.0)
     if zid == "Z_EAST_RIDGE_METRO":
         demand += 0.2
@@ -86,17 +86,31 @@ def compute_tierC_demand(p, zid):
         return "MED"
     return "LOW"
 
-def compute_priority_score(p):
+def compute_priority_score(conf, pop, crit):
     # priority_score: blend of confidence + weights
-    conf = int(p.get("confidence_score") or 0)
-    pop = float(p.get("pop_weight", 0.0))
-    crit = float(p.get("critical_weight", 0.0))
     # Weighting: confidence matters, but high demand/criticality can elevate priority.
     score = 0.6 * conf + 25.0 * pop + 25.0 * crit
     return int(clamp(round(score), 0, 100))
 
+# Confidence inputs are 0/1 flags, so score, class and Tier B requirements are
+# tabulated once for all 16 combinations instead of recomputed per hex.
+CONFIDENCE_FLAGS = ("elev_adv_avail", "tall_struct_avail", "clutter_high", "backbone_los_likely")
+CLUTTER_FLAG = CONFIDENCE_FLAGS.index("clutter_high")
+
+def confidence_row(p):
+    cs = compute_confidence_score(p)
+    cc = confidence_class(cs)
+    return (cs, cc) + tierB_requirements(cc)
+
+CONFIDENCE_TABLE = {
+    flags: confidence_row(dict(zip(CONFIDENCE_FLAGS, flags)))
+    for flags in product((0, 1), repeat=len(CONFIDENCE_FLAGS))
+}
+
 def main():
-    hexes = json.loads(HEX_PATH.read_text(encoding="utf-8"))
+    args = parse_output_args("Fill blank hex inputs with zone defaults and compute derived scores.")
+
+    hexes = load_geojson(HEX_PATH)
 
     scaffolded = 0
     scored = 0
@@ -126,22 +140,28 @@ def main():
         # if p.get("pop_weight", 0.0) == 0.0: p["pop_weight"] = defaults["pop_weight"]
         # Keeping conservative: do not override explicit 0.0.
 
-        # Derived fields
-        cs = compute_confidence_score(p)
-        cc = confidence_class(cs)
-        sites_required, alt_required = tierB_requirements(cc)
+        # Derived fields (table lookup; hand-edited values outside 0/1 fall back to the formulas)
+        flags = tuple(int(p.get(k, 0)) for k in CONFIDENCE_FLAGS)
+        row = CONFIDENCE_TABLE.get(flags)
+        if row is None:
+            row = confidence_row(p)
+        cs, cc, sites_required, alt_required = row
+        clutter = flags[CLUTTER_FLAG]
 
         p["confidence_score"] = cs
         p["confidence_class"] = cc
         p["tierB_sites_required"] = sites_required
         p["tierB_alternate_required"] = alt_required
-        p["tierC_demand_class"] = compute_tierC_demand(p, zid)
-        p["priority_score"] = compute_priority_score(p)
+        # Weights are coerced once here and handed to the formulas as plain locals.
+        pop = float(p.get("pop_weight", 0.0))
+        crit = float(p.get("critical_weight", 0.0))
+        p["tierC_demand_class"] = compute_tierC_demand(pop, clutter, zid)
+        p["priority_score"] = compute_priority_score(cs, pop, crit)
 
         f["properties"] = p
         scored += 1
 
-    HEX_PATH.write_text(json.dumps(hexes, indent=2), encoding="utf-8")
+    write_geojson(HEX_PATH, hexes, pretty=args.pretty)
     print(f"Scaffolded inputs (where blank): {scaffolded} field sets. Scored {scored} hexes.")
 
 if __name__ == "__main__":
@@ -14,19 +14,29 @@ Notes:
   - stdlib-only
   - deterministic sampling along each corridor line
   - assigns cell_id + zone_id by finding which hex polygon contains the sampled point
+  - hex polygons overlap slightly at their edges; a sample in an overlap goes to the
+    corridor's current hex (the previous sample's), not the first hex in file order
 """
 
 import csv
-import json
-from math import cos, radians, sqrt
+from bisect import bisect_left
+from itertools import accumulate
+from math import cos, floor, radians, sqrt
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from _geojson import load_geojson, parse_output_args, write_geojson
+from _parallel import pool_map
 
 CORRIDORS_PATH = Path("data/corridors.geojson")
 HEX_PATH = Path("data/hex_cells.geojson")
 SITES_PATH = Path("data/sites.geojson")
 OUT_CSV = Path("data/tiera_targets_by_corridor.csv")
 
+# Corridors are sampled and resolved in worker processes once the run samples at
+# least this many points; below that, process start-up costs more than it saves.
+PARALLEL_MIN_POINTS = 20000
+
 DEFAULT_SITE_FIELDS = {
     "tier": "A",
     "status": "CANDIDATE",
@@ -39,13 +49,12 @@ DEFAULT_SITE_FIELDS = {
 def _load_geojson(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {"type": "FeatureCollection", "features": []}
-    return json.loads(path.read_text(encoding="utf-8"))
+    return load_geojson(path)
 
-def _write_geojson(path: Path, fc: Dict[str, Any]) -> None:
-    path.write_text(json.dumps(fc, indent=2, sort_keys=True), encoding="utf-8")
+Ring = Tuple[Tuple[float, float], ...]
 
-def _point_in_ring(point: Tuple[float, float], ring: List[List[float]]) -> bool:
-    # Ray casting algorithm (planning-grade)
+def _point_in_ring(point: Tuple[float, float], ring: Ring) -> bool:
+    # Ray casting algorithm (planning-grade). ring must be explicitly closed.
     x, y = point
     inside = False
     n = len(ring)
@@ -58,36 +67,22 @@ def _point_in_ring(point: Tuple[float, float], ring: List[List[float]]) -> bool:
                 inside = not inside
     return inside
 
-def _point_in_polygon(point: Tuple[float, float], polygon_coords: Any) -> bool:
-    outer = polygon_coords[0]
-    if not _point_in_ring(point, outer):
-        return False
-    # planning-grade: ignore holes
-    return True
-
-def _deg_to_miles_lon(dlon: float, lat_deg: float) -> float:
-    return dlon * 69.0 * cos(radians(lat_deg))
-
-def _deg_to_miles_lat(dlat: float) -> float:
-    return dlat * 69.0
-
-def _segment_len_mi(a: Tuple[float, float], b: Tuple[float, float]) -> float:
-    # planning-grade: convert degrees to miles using local latitude
-    lon1, lat1 = a
-    lon2, lat2 = b
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    mx = _deg_to_miles_lon(dlon, (lat1 + lat2) / 2.0)
-    my = _deg_to_miles_lat(dlat)
-    return sqrt(mx * mx + my * my)
-
-def _line_length_mi(coords: List[List[float]]) -> float:
-    total = 0.0
-    for i in range(len(coords) - 1):
-        a = (coords[i][0], coords[i][1])
-        b = (coords[i + 1][0], coords[i + 1][1])
-        total += _segment_len_mi(a, b)
-    return total
+def _closed_ring(coords: List[List[float]]) -> Ring:
+    # Float tuples unpack faster than the JSON lists; close the ring if the file did not.
+    ring = tuple((float(p[0]), float(p[1])) for p in coords)
+    if ring and ring[0] != ring[-1]:
+        ring += (ring[0],)
+    return ring
+
+def _segment_lengths_mi(pts: List[Tuple[float, float]]) -> List[float]:
+    # planning-grade: convert degrees to miles using each segment's mid latitude.
+    # One inlined pass over the vertex pairs, with no per-segment helper calls.
+    out = []
+    for (lon1, lat1), (lon2, lat2) in zip(pts, pts[1:]):
+        mx = (lon2 - lon1) * 69.0 * cos(radians((lat1 + lat2) / 2.0))
+        my = (lat2 - lat1) * 69.0
+        out.append(sqrt(mx * mx + my * my))
+    return out
 
 def _interpolate_on_segment(a: Tuple[float, float], b: Tuple[float, float], t: float) -> Tuple[float, float]:
     return (a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t)
@@ -96,62 +91,161 @@ def _sample_points_along_line(coords: List[List[float]], n: int) -> List[Tuple[f
     """
     Deterministic: place points at equal arc-length fractions along the line.
     n>=1
+    Segment lengths are measured once; each target distance then bisects the
+    cumulative lengths for its segment instead of re-walking the line.
     """
     if n <= 0:
         return []
+    pts = [(p[0], p[1]) for p in coords]
+    seg_lens = _segment_lengths_mi(pts)
+    cum = list(accumulate(seg_lens))
+    total_len = cum[-1] if cum else 0.0
+
     if n == 1:
         # midpoint by distance
-        target = _line_length_mi(coords) / 2.0
-        return [_point_at_distance(coords, target)]
-
-    total_len = _line_length_mi(coords)
-    if total_len <= 0:
+        targets = [total_len / 2.0]
+    elif total_len <= 0:
         # degenerate line: return first coord repeated
-        lon, lat = coords[0][0], coords[0][1]
-        return [(lon, lat) for _ in range(n)]
-
-    # Place at fractions excluding endpoints (more useful than sampling exact endpoints)
-    # i = 1..n => fraction = i/(n+1)
-    targets = [total_len * (i / (n + 1)) for i in range(1, n + 1)]
-    return [_point_at_distance(coords, d) for d in targets]
-
-def _point_at_distance(coords: List[List[float]], dist_mi: float) -> Tuple[float, float]:
-    walked = 0.0
-    for i in range(len(coords) - 1):
-        a = (coords[i][0], coords[i][1])
-        b = (coords[i + 1][0], coords[i + 1][1])
-        seg = _segment_len_mi(a, b)
-        if walked + seg >= dist_mi:
-            t = 0.0 if seg == 0 else (dist_mi - walked) / seg
-            return _interpolate_on_segment(a, b, t)
-        walked += seg
-    # If rounding puts us past the end, return last point
-    return (coords[-1][0], coords[-1][1])
-
-def _build_hex_index(hex_features: List[Dict[str, Any]]) -> List[Tuple[str, str, Any]]:
+        return [pts[0]] * n
+    else:
+        # Place at fractions excluding endpoints (more useful than sampling exact endpoints)
+        # i = 1..n => fraction = i/(n+1)
+        targets = [total_len * (i / (n + 1)) for i in range(1, n + 1)]
+
+    out = []
+    for dist_mi in targets:
+        i = bisect_left(cum, dist_mi)
+        if i == len(cum):
+            # If rounding puts us past the end, return last point
+            out.append(pts[-1])
+            continue
+        seg = seg_lens[i]
+        walked = cum[i - 1] if i else 0.0
+        t = 0.0 if seg == 0 else (dist_mi - walked) / seg
+        out.append(_interpolate_on_segment(pts[i], pts[i + 1], t))
+    return out
+
+class HexEntry(NamedTuple):
+    cell_id: str
+    zone_id: str
+    ring: Ring  # outer ring only, see _closed_ring
+    bbox: Tuple[float, float, float, float]  # (minx, miny, maxx, maxy)
+
+HexGrid = Tuple[float, Dict[Tuple[int, int], List[int]]]
+
+def _build_hex_index(hex_features: List[Dict[str, Any]]) -> List[HexEntry]:
     """
-    Returns list of (cell_id, zone_id, polygon_coords)
+    Returns list of HexEntry(cell_id, zone_id, ring, bbox)
+    ring is converted once here (see _closed_ring); holes are ignored (planning-grade).
+    bbox is (minx, miny, maxx, maxy) of the outer ring.
+    Hexes without Polygon geometry, cell_id or zone_id are skipped.
     """
     out = []
     for f in hex_features:
-        props = f.get("properties", {}) or {}
-        geom = f.get("geometry", {}) or {}
-        if geom.get("type") != "Polygon":
+        geom = f.get("geometry")
+        props = f.get("properties")
+        if not geom or not props or geom.get("type") != "Polygon":
             continue
-        cell_id = props.get("cell_id") or props.get("id") or props.get("hex_id")
-        zone_id = props.get("zone_id")
+        get = props.get
+        cell_id = get("cell_id") or get("id") or get("hex_id")
+        zone_id = get("zone_id")
         if cell_id is None or zone_id is None:
             continue
-        out.append((str(cell_id), str(zone_id), geom.get("coordinates")))
+        ring = _closed_ring(geom["coordinates"][0])
+        xs = [p[0] for p in ring]
+        ys = [p[1] for p in ring]
+        out.append(HexEntry(str(cell_id), str(zone_id), ring, (min(xs), min(ys), max(xs), max(ys))))
     return out
 
-def _find_hex_for_point(pt: Tuple[float, float], hex_index: List[Tuple[str, str, Any]]) -> Optional[Tuple[str, str]]:
-    for cell_id, zone_id, poly_coords in hex_index:
-        if _point_in_polygon(pt, poly_coords):
-            return (cell_id, zone_id)
+def _build_hex_grid(hex_index: List[HexEntry]) -> HexGrid:
+    """
+    Uniform lon/lat grid over the hex bboxes: (step, {(gx, gy): [hex_index positions]}).
+    step is the largest hex extent, so each hex lands in at most 2x2 buckets and a
+    bucket holds only a handful of hexes. Buckets keep hex_index order, which sets
+    the scan order when a lookup misses its cached hex (see _find_hex_with_cache).
+    """
+    step = max((max(b[2] - b[0], b[3] - b[1]) for _, _, _, b in hex_index), default=0.0) or 1.0
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    for i, (minx, miny, maxx, maxy) in enumerate(entry.bbox for entry in hex_index):
+        for gx in range(floor(minx / step), floor(maxx / step) + 1):
+            for gy in range(floor(miny / step), floor(maxy / step) + 1):
+                buckets.setdefault((gx, gy), []).append(i)
+    return step, buckets
+
+def _hex_contains(entry: HexEntry, x: float, y: float) -> bool:
+    _, _, ring, (minx, miny, maxx, maxy) = entry
+    # AABB early reject: a bucket spans several hexes, most of which miss the point,
+    # and the chained comparisons short-circuit before the ray cast.
+    return minx <= x <= maxx and miny <= y <= maxy and _point_in_ring((x, y), ring)
+
+def _find_hex_with_cache(
+    pt: Tuple[float, float], hex_index: List[HexEntry], candidates: Sequence[int], last_hit: Optional[int]
+) -> Optional[int]:
+    """
+    Position in hex_index of a hex containing pt, or None.
+    last_hit (the hex of the previous point) is tested first: consecutive samples along
+    a corridor usually share a hex. Otherwise candidates (the hexes of pt's grid bucket)
+    are scanned in hex_index order.
+    Neighbouring hex polygons overlap slightly, so where last_hit contains pt it wins
+    even if an earlier hex in file order also does: the result depends on the previous
+    point and is not the first-match of a linear scan.
+    """
+    x, y = pt
+    if last_hit is not None and _hex_contains(hex_index[last_hit], x, y):
+        return last_hit
+    for i in candidates:
+        if i != last_hit and _hex_contains(hex_index[i], x, y):
+            return i
     return None
 
+def _assign_points_to_hexes(
+    points: List[Tuple[float, float]], hex_index: List[HexEntry], hex_grid: HexGrid
+) -> List[Optional[Tuple[str, str]]]:
+    """
+    (cell_id, zone_id) for each point, or None where no hex contains it. Points are
+    looked up one at a time in sampling order: the hex that matched the previous point
+    is tried first, then the hexes of the point's grid bucket (see _find_hex_with_cache).
+    A point in the overlap of two hexes stays in the hex the previous point matched.
+    """
+    step, buckets = hex_grid
+    out: List[Optional[Tuple[str, str]]] = [None] * len(points)
+    last_hit: Optional[int] = None
+    for j, (x, y) in enumerate(points):
+        candidates = buckets.get((floor(x / step), floor(y / step)), ())
+        hit = _find_hex_with_cache((x, y), hex_index, candidates, last_hit)
+        if hit is not None:
+            last_hit = hit
+            entry = hex_index[hit]
+            out[j] = (entry.cell_id, entry.zone_id)
+    return out
+
+def _seed_corridor(
+    coords: List[List[float]], total: int, hex_index: List[HexEntry], hex_grid: HexGrid
+) -> List[Tuple[int, float, float, Tuple[str, str]]]:
+    """
+    Sample `total` points along one corridor and resolve them against the hexes.
+    Returns (i, lon, lat, (cell_id, zone_id)) for the points that landed in a hex,
+    in sampling order; points outside every hex are dropped here.
+    """
+    pts = _sample_points_along_line(coords, total)
+    matches = _assign_points_to_hexes(pts, hex_index, hex_grid)
+    return [(i, lon, lat, match) for i, ((lon, lat), match) in enumerate(zip(pts, matches)) if match is not None]
+
+# (hex_index, hex_grid) shared by _seed_corridor_job(); set once per process by _init_hex_state().
+_HEX_STATE = None
+
+def _init_hex_state(state: Tuple[List[HexEntry], HexGrid]) -> None:
+    global _HEX_STATE
+    _HEX_STATE = state
+
+def _seed_corridor_job(job: Tuple[List[List[float]], int]) -> List[Tuple[int, float, float, Tuple[str, str]]]:
+    coords, total = job
+    hex_index, hex_grid = _HEX_STATE
+    return _seed_corridor(coords, total, hex_index, hex_grid)
+
 def main() -> None:
+    args = parse_output_args("Seed Tier A candidate sites from corridor LineStrings.")
+
     corridors_fc = _load_geojson(CORRIDORS_PATH)
     hex_fc = _load_geojson(HEX_PATH)
     sites_fc = _load_geojson(SITES_PATH)
@@ -165,14 +259,15 @@ def main() -> None:
 
     # Keep existing non-Tier-A sites; drop existing Tier A so we can regenerate deterministically
     existing = sites_fc.get("features", [])
-    kept = [f for f in existing if (f.get("properties", {}) or {}).get("tier") != "A"]
+    kept = [f for f in existing if (f.get("properties") or {}).get("tier") != "A"]
 
     hex_index = _build_hex_index(hex_features)
-
-    seeded: List[Dict[str, Any]] = []
-    seq = 1
+    hex_grid = _build_hex_grid(hex_index)
 
     rollup: Dict[str, Dict[str, int]] = {}
+    # (corridor_id, required) per seeded corridor, aligned with jobs.
+    seeds: List[Tuple[Any, int]] = []
+    jobs: List[Tuple[List[List[float]], int]] = []
 
     for c in corridors:
         props = c.get("properties", {}) or {}
@@ -200,16 +295,22 @@ def main() -> None:
         if total == 0:
             continue
 
-        coords = geom.get("coordinates", [])
-        pts = _sample_points_along_line(coords, total)
+        seeds.append((corridor_id, required))
+        jobs.append((geom.get("coordinates", []), total))
+
+    # Corridors are independent, so large runs fan them out across processes; each
+    # worker receives the hex index once through the pool initializer.
+    state = (hex_index, hex_grid)
+    large = sum(total for _, total in jobs) >= PARALLEL_MIN_POINTS
+    results = pool_map(_seed_corridor_job, jobs, _init_hex_state, state, parallel=large)
+
+    # site_ids are numbered here, in corridor order, so they never depend on scheduling.
+    seeded: List[Dict[str, Any]] = []
+    seq = 1
 
-        for i in range(total):
-            lon, lat = pts[i]
-            match = _find_hex_for_point((lon, lat), hex_index)
-            if match is None:
-                # If point falls outside all hexes (unlikely), skip deterministically
-                continue
-            cell_id, zone_id = match
+    for (corridor_id, required), matched in zip(seeds, results):
+        # Points that fall outside all hexes (unlikely) are skipped deterministically
+        for i, lon, lat, (cell_id, zone_id) in matched:
             is_alt = i >= required
 
             site_id = f"S_A_{seq:04d}"
@@ -222,8 +323,8 @@ def main() -> None:
                 "zone_id": zone_id,
                 "corridor_id": corridor_id,
                 "notes": "ALT" if is_alt else "",
-                **DEFAULT_SITE_FIELDS,
             }
+            p.update(DEFAULT_SITE_FIELDS)
 
             seeded.append(
                 {
@@ -234,14 +335,12 @@ def main() -> None:
             )
 
     out_fc = {"type": "FeatureCollection", "features": kept + seeded}
-    _write_geojson(SITES_PATH, out_fc)
+    write_geojson(SITES_PATH, out_fc, pretty=args.pretty, sort_keys=True)
 
     with OUT_CSV.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["corridor_id", "required", "alternate", "total"])
-        for cid in sorted(rollup.keys()):
-            row = rollup[cid]
-            w.writerow([cid, row["required"], row["alternate"], row["total"]])
+        w.writerows([cid, r["required"], r["alternate"], r["total"]] for cid, r in sorted(rollup.items()))
 
     print(f"Seeded Tier A candidates: {len(seeded)}")
     print(f"Wrote: {SITES_PATH}")
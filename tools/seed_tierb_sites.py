@@ -16,13 +16,18 @@ Design goals:
 """
 
 import csv
-import json
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from _geojson import load_geojson, parse_output_args, write_geojson
+from _geom import ring_area_centroid
 
 HEX_PATH = Path("data/hex_cells.geojson")
 SITES_PATH = Path("data/sites.geojson")
 OUT_CSV = Path("data/tierb_requirements_by_zone.csv")
+# Append mode only: sidecar cache of the last S_B_ sequence number written to SITES_PATH
+# (see _read_seq_sidecar).
+SEQ_PATH = Path("data/.sites_seq")
 
 # If True: replace sites.geojson with ONLY seeded Tier B candidates.
 # If False: keep existing features and append Tier B candidates.
@@ -42,39 +47,19 @@ DEFAULT_SITE_FIELDS = {
 def _load_geojson(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {"type": "FeatureCollection", "features": []}
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def _write_geojson(path: Path, fc: Dict[str, Any]) -> None:
-    path.write_text(json.dumps(fc, indent=2, sort_keys=True), encoding="utf-8")
-
-
-def _polygon_area(ring: Iterable[Tuple[float, float]]) -> float:
-    points = list(ring)
-    if len(points) < 3:
-        return 0.0
-    area = 0.0
-    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
-        area += x1 * y2 - x2 * y1
-    return abs(area) / 2.0
-
-
-def _centroid_from_ring(ring: List[List[float]]) -> Tuple[float, float]:
-    # Planning-grade centroid for a ring; assumes last point repeats the first.
-    xs = [p[0] for p in ring[:-1]]
-    ys = [p[1] for p in ring[:-1]]
-    return (sum(xs) / len(xs), sum(ys) / len(ys))
+    return load_geojson(path)
 
 
 def _get_centroid(geom: Dict[str, Any]) -> Tuple[float, float]:
     gtype = geom.get("type")
     coords = geom.get("coordinates")
     if gtype == "Polygon":
-        return _centroid_from_ring(coords[0])
+        _, cx, cy = ring_area_centroid(coords[0])
+        return (cx, cy)
     if gtype == "MultiPolygon":
         # Use largest outer ring by area for a stable planning-grade centroid.
-        largest = max(coords, key=lambda poly: _polygon_area([(p[0], p[1]) for p in poly[0][:-1]]))
-        return _centroid_from_ring(largest[0])
+        _, cx, cy = max((ring_area_centroid(poly[0]) for poly in coords), key=lambda r: r[0])
+        return (cx, cy)
     raise SystemExit(f"Unsupported geometry type for hex: {gtype}")
 
 
@@ -121,7 +106,30 @@ def _new_site_id(seq: int) -> str:
     return f"S_B_{seq:04d}"
 
 
+def _sites_stamp(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _read_seq_sidecar() -> Optional[int]:
+    # "<last seq> <size:mtime_ns of SITES_PATH>". Trusted only while sites.geojson is
+    # exactly the file this script last wrote; any other edit falls back to the scan.
+    try:
+        last, stamp = SEQ_PATH.read_text(encoding="utf-8").split()
+        if stamp == _sites_stamp(SITES_PATH):
+            return int(last)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _write_seq_sidecar(last_seq: int) -> None:
+    SEQ_PATH.write_text(f"{last_seq} {_sites_stamp(SITES_PATH)}\n", encoding="utf-8")
+
+
 def main() -> None:
+    args = parse_output_args("Seed Tier B candidate sites from scored hexes.")
+
     hex_fc = _load_geojson(HEX_PATH)
     hex_features = hex_fc.get("features", [])
     if not hex_features:
@@ -134,7 +142,10 @@ def main() -> None:
     if not REPLACE_SITES_FILE:
         kept_features = existing_features
 
-    seq = _next_site_seq(kept_features) if kept_features else 1
+    seq = 1
+    if not REPLACE_SITES_FILE and kept_features:
+        last_seq = _read_seq_sidecar()
+        seq = last_seq + 1 if last_seq is not None else _next_site_seq(kept_features)
 
     by_zone: Dict[str, Dict[str, int]] = {}
     seeded: List[Dict[str, Any]] = []
@@ -178,9 +189,9 @@ def main() -> None:
                 "site_name": site_name,
                 "cell_id": cell_id,
                 "zone_id": zone_id,
-                **DEFAULT_SITE_FIELDS,
                 "notes": "ALT" if is_alt else "",
             }
+            p.update(DEFAULT_SITE_FIELDS)
 
             seeded.append(
                 {
@@ -191,14 +202,18 @@ def main() -> None:
             )
 
     out_fc = {"type": "FeatureCollection", "features": kept_features + seeded}
-    _write_geojson(SITES_PATH, out_fc)
+    write_geojson(SITES_PATH, out_fc, pretty=args.pretty, sort_keys=True)
+    # The sidecar only serves append mode; replace mode always restarts at S_B_0001.
+    if not REPLACE_SITES_FILE:
+        _write_seq_sidecar(seq - 1)
 
     with OUT_CSV.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["zone_id", "tierB_sites_required", "tierB_alternate_required", "total"])
-        for zone_id in sorted(by_zone.keys()):
-            row = by_zone[zone_id]
-            w.writerow([zone_id, row["tierB_sites_required"], row["tierB_alternate_required"], row["total"]])
+        w.writerows(
+            [zone_id, z["tierB_sites_required"], z["tierB_alternate_required"], z["total"]]
+            for zone_id, z in sorted(by_zone.items())
+        )
 
     print(f"Seeded Tier B candidates: {len(seeded)}")
     print(f"Wrote: {SITES_PATH}")
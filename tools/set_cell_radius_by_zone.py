@@ -1,5 +1,6 @@
-﻿import json
-from pathlib import Path
+﻿from pathlib import Path
+
+from _geojson import load_geojson, parse_output_args, write_geojson
 
 HEX_PATH = Path("data/hex_cells.geojson")
 
@@ -9,32 +10,46 @@ RADIUS_BY_ZONE = {
     "Z_EAST_RIDGE_METRO": 35,
 }
 
+UNKNOWN_ZONE_TAG = "zone_id missing/unknown; cell_radius_mi left default"
+
 def main():
-    hexes = json.loads(HEX_PATH.read_text(encoding="utf-8"))
+    args = parse_output_args("Set cell_radius_mi on each hex from its zone_id.")
+
+    hexes = load_geojson(HEX_PATH)
 
     changed = 0
     unknown = 0
+    tagged = 0
+    untagged = 0
 
     for f in hexes["features"]:
-        props = f.get("properties", {})
+        props = f.setdefault("properties", {})
         zid = props.get("zone_id", "")
 
-        if zid in RADIUS_BY_ZONE:
-            new_r = RADIUS_BY_ZONE[zid]
+        new_r = RADIUS_BY_ZONE.get(zid)
+        if new_r is not None:
             if props.get("cell_radius_mi") != new_r:
                 props["cell_radius_mi"] = new_r
                 changed += 1
+            # Zone resolved: drop the cache so the hex is re-checked if it goes unknown again.
+            if props.pop("_zone_tagged", None) is not None:
+                untagged += 1
         else:
-            # Leave default, but annotate if zone_id is blank/unknown
+            # Leave default, but annotate if zone_id is blank/unknown. _zone_tagged records
+            # that the note carries the tag, so re-runs skip the substring scan.
             unknown += 1
-            note = props.get("notes", "") or ""
-            tag = "zone_id missing/unknown; cell_radius_mi left default"
-            if tag not in note:
-                props["notes"] = (note + ("; " if note else "") + tag)
-
-        f["properties"] = props
-
-    HEX_PATH.write_text(json.dumps(hexes, indent=2), encoding="utf-8")
+            if not props.get("_zone_tagged"):
+                note = props.get("notes", "") or ""
+                if UNKNOWN_ZONE_TAG not in note:
+                    props["notes"] = (note + ("; " if note else "") + UNKNOWN_ZONE_TAG)
+                props["_zone_tagged"] = True
+                tagged += 1
+
+    # Re-runs are usually no-ops; leave the file (and its mtime) alone unless a hex changed.
+    if changed or tagged or untagged:
+        write_geojson(HEX_PATH, hexes, pretty=args.pretty)
+    else:
+        print(f"No changes; {HEX_PATH} left as-is.")
     print(f"Updated cell_radius_mi for {changed} hexes. {unknown} hexes had missing/unknown zone_id.")
 
 if __name__ == "__main__":